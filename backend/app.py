@@ -26,6 +26,10 @@ from extract_pea_reading import extract_from_pdf as extract_pea, visualize_coord
 # Email validation regex (RFC 5322 simplified)
 EMAIL_REGEX = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
 
+# Electricity/purchased-energy categories (Scope 2); compiled once instead of
+# scanning a keyword list per record
+SCOPE2_CATEGORY_RE = re.compile(r'electricity|grid mix|electric|grid|power|energy', re.IGNORECASE)
+
 def validate_email(email):
     """Validate email format"""
     if not email or not isinstance(email, str):
@@ -2816,38 +2820,35 @@ def preview_report_data(current_user):
         # Group by scope (Scope 1 and 2 only - Scope 3 not used)
         emissions_by_scope = {'Scope 1': 0, 'Scope 2': 0}
 
+        # Scope per distinct category is resolved once and cached for the
+        # request, so the per-record loop never repeats the factor lookup or
+        # keyword scan (records >> distinct categories)
+        scope_cache = {}
+
         def get_emission_scope(category):
             """Determine scope based on database lookup or category name"""
+            cached = scope_cache.get(category)
+            if cached is not None:
+                return cached
+
+            scope = None
             # First, try to find the scope from the emission_factors database
             emission_factor = emission_factors_collection.find_one({'name': category})
             if emission_factor and 'scope' in emission_factor:
-                scope_value = emission_factor['scope']
+                scope = emission_factor['scope']
                 # Map Scope 3 to Scope 1 if it exists in database
-                if scope_value == 3:
-                    return 1
-                return scope_value
-
-            # Fallback to keyword matching
-            category_lower = category.lower()
-
-            # Scope 2: Electricity (all forms)
-            if any(keyword in category_lower for keyword in ['electricity', 'grid mix', 'electric', 'grid', 'power', 'energy']):
-                return 2
-
-            # Scope 1: All combustion, fugitive emissions, waste, transport, and other direct emissions
-            scope1_keywords = ['diesel', 'gasoline', 'petrol', 'natural gas', 'coal',
-                              'fuel oil', 'kerosene', 'lpg', 'cng', 'biogas', 'wood',
-                              'bagasse', 'palm', 'corn', 'r-', 'refrigerant', 'fugitive',
-                              'hfc', 'pfc', 'sf6', 'nf3', 'waste', 'transport',
-                              'fuel', 'mobile', 'vehicle', 'combustion', 'stationary',
-                              'biomass', 'anthracite', 'bituminous', 'lignite',
-                              'heavy fuel oil', 'gas oil', 'equipment', 'machinery',
-                              'agriculture', 'forestry', 'construction']
-            if any(keyword in category_lower for keyword in scope1_keywords):
-                return 1
-
-            # Default to Scope 1 for unknown categories
-            return 1
+                if scope == 3:
+                    scope = 1
+            elif SCOPE2_CATEGORY_RE.search(category):
+                # Scope 2: Electricity (all forms)
+                scope = 2
+            else:
+                # Scope 1: combustion, fugitive emissions, waste, transport and
+                # any other direct or unknown categories
+                scope = 1
+
+            scope_cache[category] = scope
+            return scope
 
         for emission in emissions:
             category = emission.get('category', 'other')
@@ -22,6 +22,8 @@ emission_factors_collection = db['emission_factors']
 reports_collection = db['reports']
 audits_collection = db['audits']  # Added this
 edit_requests_collection = db['edit_requests']  # Added for user requests
+counters_collection = db['counters']  # Atomic sequence counters (report IDs)
+ai_cache_collection = db['ai_content_cache']  # Memoized AI report sections (24h TTL)
 
 # Create indexes for better performance
 def create_indexes():
@@ -75,6 +77,12 @@ def create_indexes():
         ('user_id', ASCENDING),
         ('create_date', DESCENDING)
     ], name='user_reports_idx')
+    # OPTIMIZED: Unique index so report_id lookups are an index walk and
+    # duplicate RPT numbers are rejected at insert time.
+    # NOTE: on deployments where the old scan-and-sort id scheme raced and
+    # produced duplicate RPT*** values, this create_index fails until those
+    # duplicates are renumbered - dedup the reports collection first.
+    reports_collection.create_index([('report_id', DESCENDING)], unique=True, sparse=True)
 
     # OPTIMIZED: Emission factors compound index
     emission_factors_collection.create_index([
@@ -82,6 +90,10 @@ def create_indexes():
         ('unit', ASCENDING)
     ], name='factor_lookup_idx')
 
+    # AI content cache: lookup by content hash, entries expire after 24 hours
+    ai_cache_collection.create_index([('cache_key', ASCENDING)], unique=True)
+    ai_cache_collection.create_index([('created_at', ASCENDING)], expireAfterSeconds=86400)
+
     # Audits indexes
     audits_collection.create_index([('user_id', ASCENDING)])
     audits_collection.create_index([('audit_time', DESCENDING)])
@@ -230,7 +242,7 @@ def calculate_co2_equivalent(activity_type, amount, unit, language='en'):
     if cache_key in EMISSION_FACTORS_CACHE:
         factor = EMISSION_FACTORS_CACHE[cache_key]
         print(f"✅ Cache hit: {factor['fuel_key']} = {factor['value']} {factor['unit']}")
-        return amount * factor['value']
+        return float(amount) * float(factor['value'])
 
     # Fallback to database if not in cache
     print("⚠️ Cache miss - querying database")
@@ -245,7 +257,7 @@ def calculate_co2_equivalent(activity_type, amount, unit, language='en'):
         print(f"Found fuel_key match: {factor['fuel_key']} = {factor['value']} {factor['unit']}")
         # Add to cache for next time
         EMISSION_FACTORS_CACHE[cache_key] = factor
-        return amount * factor['value']
+        return float(amount) * float(factor['value'])
     
     # PRIORITY 2: Try exact name match (for refrigerants like "R-143a")
     factor = emission_factors_collection.find_one({
@@ -255,7 +267,7 @@ def calculate_co2_equivalent(activity_type, amount, unit, language='en'):
     
     if factor:
         print(f"Found exact name match: {factor['name']} = {factor['value']} {factor['unit']}")
-        return amount * factor['value']
+        return float(amount) * float(factor['value'])
     
     # PRIORITY 3: Try case-insensitive exact name match
     factor = emission_factors_collection.find_one({
@@ -265,7 +277,7 @@ def calculate_co2_equivalent(activity_type, amount, unit, language='en'):
     
     if factor:
         print(f"Found case-insensitive exact name match: {factor['name']} = {factor['value']} {factor['unit']}")
-        return amount * factor['value']
+        return float(amount) * float(factor['value'])
     
     # PRIORITY 2: Try refrigerant fuel_key mapping (R-143a -> r143a)
     refrigerant_mappings = {
@@ -287,7 +299,7 @@ def calculate_co2_equivalent(activity_type, amount, unit, language='en'):
         
         if factor:
             print(f"Found refrigerant match: {mapped_refrigerant} = {factor['value']} {factor['unit']}")
-            return amount * factor['value']
+            return float(amount) * float(factor['value'])
     
     # PRIORITY 3: Try activity_type exact match 
     factor = emission_factors_collection.find_one({
@@ -297,7 +309,7 @@ def calculate_co2_equivalent(activity_type, amount, unit, language='en'):
     
     if factor:
         print(f"Found activity_type match: {factor['activity_type']} = {factor['value']} {factor['unit']}")
-        return amount * factor['value']
+        return float(amount) * float(factor['value'])
     
     # PRIORITY 4: Try to find by activity_types array (for mapped common types)
     factor = emission_factors_collection.find_one({
@@ -310,7 +322,7 @@ def calculate_co2_equivalent(activity_type, amount, unit, language='en'):
     
     if factor:
         print(f"Found activity_types array match: {factor['name']} = {factor['value']} {factor['unit']}")
-        return amount * factor['value']
+        return float(amount) * float(factor['value'])
     
     # PRIORITY 5: Try unit variations
     unit_mappings = {
@@ -338,7 +350,7 @@ def calculate_co2_equivalent(activity_type, amount, unit, language='en'):
         
         if factor:
             print(f"Found unit mapping match: {factor['name']} = {factor['value']} {mapped_unit}")
-            return amount * factor['value']
+            return float(amount) * float(factor['value'])
     
     # PRIORITY 6: Activity type mappings for common categories
     activity_mappings = {
@@ -360,26 +372,26 @@ def calculate_co2_equivalent(activity_type, amount, unit, language='en'):
         
         if factor:
             print(f"Found activity mapping match: {mapped_activity} = {factor['value']} {factor['unit']}")
-            return amount * factor['value']
+            return float(amount) * float(factor['value'])
     
     # PRIORITY 7: Hardcoded TGO fallbacks
     # Fallback to TGO Thailand grid electricity factor for electricity
     if 'electric' in activity_type_lower or 'power' in activity_type_lower:
         if unit_lower in ['kwh', 'kw']:
             print(f"Using TGO electricity fallback: 0.4999 kgCO2/kWh")
-            return amount * 0.4999  # TGO Thailand grid factor
+            return float(amount) * 0.4999  # TGO Thailand grid factor
     
     # Fallback to TGO diesel factor for diesel
     if 'diesel' in activity_type_lower:
         if unit_lower in ['litre', 'liter', 'l']:
             print(f"Using TGO diesel fallback: 2.7078 kgCO2/litre")
-            return amount * 2.7078  # TGO diesel factor
+            return float(amount) * 2.7078  # TGO diesel factor
     
     # Fallback to TGO gasoline factor for gasoline
     if 'gasoline' in activity_type_lower or 'petrol' in activity_type_lower:
         if unit_lower in ['litre', 'liter', 'l']:
             print(f"Using TGO gasoline fallback: 2.1894 kgCO2/litre")
-            return amount * 2.1894  # TGO gasoline factor
+            return float(amount) * 2.1894  # TGO gasoline factor
     
     print(f"❌ ERROR: No emission factor found for activity_type='{activity_type}', unit='{unit}'")
     
@@ -389,7 +401,7 @@ def calculate_co2_equivalent(activity_type, amount, unit, language='en'):
     for f in factors:
         print(f"  - {f.get('name', 'N/A')} ({f.get('fuel_key', 'N/A')}) = {f.get('value', 0)} {f.get('unit', 'N/A')}")
     
-    return 0
+    return 0.0
 
 # Display database info
 def display_db_info():